@@ -1,27 +1,115 @@
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 from recommendation_engine import RecommendationEngine
-from data_processor import DataProcessor
+from data_processor import DataProcessor, SAMPLE_DATA_DIR
+import functools
+import gzip
+import orjson
 import os
+import threading
 
 app = Flask(__name__)
 CORS(app)
 
-# Global variables to store data and engine
-movies_df = None
-ratings_df = None
-engine = None
+# Guards the one-time data load and engine build, so concurrent first
+# requests (threaded server, reloader, workers) never build it twice
+_init_lock = threading.RLock()
+
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# Responses smaller than this are not worth compressing
+GZIP_MIN_SIZE = 2048
+
+# Prebuilt engine for the sample data, reused across restarts while it matches
+ENGINE_CACHE_PATH = os.path.join(SAMPLE_DATA_DIR, 'engine.joblib')
+
+def to_arrow_stream(df):
+    """Serialize a DataFrame to Arrow IPC stream bytes"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def to_columns(df):
+    """Map each column name to its values, passing numeric columns through as numpy arrays"""
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if values.dtype.kind in 'biuf':
+            columns[col] = np.ascontiguousarray(values)
+        else:
+            columns[col] = df[col].astype(object).where(df[col].notna(), None).tolist()
+    return columns
+
+def to_json(data):
+    """Serialize data with orjson, passing numpy scalars and arrays through as-is"""
+    return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+def accepts_gzip():
+    """Check whether the client accepts gzip-encoded responses (gzip;q=0 is a refusal)"""
+    return request.accept_encodings.quality('gzip') > 0
+
+def wants_arrow():
+    """Check whether the client prefers an Arrow stream over JSON"""
+    best = request.accept_mimetypes.best_match(['application/json', ARROW_STREAM_MIMETYPE])
+    return best == ARROW_STREAM_MIMETYPE
+
+@functools.lru_cache(maxsize=1)
+def _build_engine():
+    processor = DataProcessor()
+    movies_df, ratings_df = processor.load_sample_data()
+    
+    engine = RecommendationEngine.load(ENGINE_CACHE_PATH, movies_df, ratings_df)
+    if engine is None:
+        engine = RecommendationEngine(movies_df, ratings_df)
+        try:
+            engine.save(ENGINE_CACHE_PATH)
+        except OSError as e:
+            print(f"Could not cache recommendation engine: {e}")
+    return movies_df, ratings_df, engine
+
+def get_engine():
+    """Get (movies_df, ratings_df, engine), loading the data on first use"""
+    with _init_lock:
+        return _build_engine()
+
+@functools.lru_cache(maxsize=1)
+def _build_payloads():
+    movies_df, ratings_df, _ = get_engine()
+    avg_rating, rating_distribution = DataProcessor.summarize_ratings(ratings_df['rating'])
+    stats = {
+        'total_movies': len(movies_df),
+        'total_ratings': len(ratings_df),
+        'total_users': np.unique(ratings_df['userId'].to_numpy()).size,
+        'avg_rating': avg_rating,
+        'rating_distribution': rating_distribution.to_dict()
+    }
+    # Column-oriented: {"movieId": [...], "title": [...], ...}
+    movies_json = to_json(to_columns(movies_df))
+    return {
+        'movies_json': movies_json,
+        'movies_json_gzip': gzip.compress(movies_json),
+        'movies_arrow': to_arrow_stream(movies_df),
+        'stats_json': to_json(stats)
+    }
+
+def get_payloads():
+    """
+    Get the response bodies of the read-only endpoints. The datasets never
+    change after loading, so these are serialized once and served as bytes.
+    """
+    with _init_lock:
+        return _build_payloads()
 
 def initialize_data():
     """Initialize the recommendation engine with data"""
-    global movies_df, ratings_df, engine
-    
     try:
-        processor = DataProcessor()
-        movies_df, ratings_df = processor.load_sample_data()
-        engine = RecommendationEngine(movies_df, ratings_df)
+        get_engine()
+        get_payloads()
         print("Recommendation engine initialized successfully")
     except Exception as e:
         print(f"Error initializing data: {e}")
@@ -39,16 +127,32 @@ def serve_static(filename):
 @app.route('/api/movies')
 def get_movies():
     """Get all movies"""
-    if movies_df is None:
+    try:
+        payloads = get_payloads()
+    except Exception as e:
+        print(f"Error initializing data: {e}")
         return jsonify({'error': 'Data not initialized'}), 500
     
-    movies_list = movies_df.to_dict('records')
-    return jsonify(movies_list)
+    if wants_arrow():
+        response = Response(payloads['movies_arrow'], mimetype=ARROW_STREAM_MIMETYPE)
+    elif accepts_gzip():
+        response = Response(payloads['movies_json_gzip'], mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+    else:
+        response = Response(payloads['movies_json'], mimetype='application/json')
+    
+    # The format was negotiated on Accept, so caches must key on it too
+    response.vary.add('Accept')
+    return response
 
 @app.route('/api/recommendations', methods=['POST'])
 def get_recommendations():
     """Get recommendations based on selected movies and algorithm"""
-    if engine is None:
+    try:
+        _, _, engine = get_engine()
+    except Exception as e:
+        print(f"Error initializing data: {e}")
         return jsonify({'error': 'Recommendation engine not initialized'}), 500
     
     try:
@@ -70,9 +174,16 @@ def get_recommendations():
         else:
             return jsonify({'error': 'Invalid algorithm'}), 400
         
-        # Convert to list of dictionaries
-        recommendations_list = recommendations.to_dict('records')
-        return jsonify(recommendations_list)
+        if wants_arrow():
+            response = Response(to_arrow_stream(recommendations), mimetype=ARROW_STREAM_MIMETYPE)
+        else:
+            # Convert to list of dictionaries
+            recommendations_list = recommendations.to_dict('records')
+            response = Response(to_json(recommendations_list), mimetype='application/json')
+        
+        # The format was negotiated on Accept, so caches must key on it too
+        response.vary.add('Accept')
+        return response
         
     except Exception as e:
         print(f"Error generating recommendations: {e}")
@@ -81,24 +192,41 @@ def get_recommendations():
 @app.route('/api/stats')
 def get_stats():
     """Get dataset statistics"""
-    if movies_df is None or ratings_df is None:
+    try:
+        payloads = get_payloads()
+    except Exception as e:
+        print(f"Error initializing data: {e}")
         return jsonify({'error': 'Data not initialized'}), 500
     
-    stats = {
-        'total_movies': len(movies_df),
-        'total_ratings': len(ratings_df),
-        'total_users': ratings_df['userId'].nunique(),
-        'avg_rating': float(ratings_df['rating'].mean()),
-        'rating_distribution': ratings_df['rating'].value_counts().sort_index().to_dict()
-    }
+    return Response(payloads['stats_json'], mimetype='application/json')
+
+@app.after_request
+def compress_response(response):
+    """Gzip larger responses for clients that accept it"""
+    if (response.direct_passthrough or response.status_code != 200
+            or 'Content-Encoding' in response.headers or not accepts_gzip()):
+        return response
     
-    return jsonify(stats)
+    body = response.get_data()
+    if len(body) < GZIP_MIN_SIZE:
+        return response
+    
+    response.set_data(gzip.compress(body, compresslevel=1))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
 
 @app.route('/api/health')
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'engine_ready': engine is not None})
+    engine_ready = _build_engine.cache_info().currsize > 0
+    return jsonify({'status': 'healthy', 'engine_ready': engine_ready})
+
+# Warm the engine at import time, so that under
+#   gunicorn -w $(nproc) -k gthread --preload api_server:app
+# it happens once in the master and the workers share it copy-on-write
+initialize_data()
 
 if __name__ == '__main__':
-    initialize_data()
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # No debug reloader: it would import the module twice and rebuild the engine
+    app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
@@ -47,6 +47,31 @@ def load_data():
     movies_df, ratings_df = processor.load_sample_data()
     return movies_df, ratings_df
 
+@st.cache_resource
+def get_engine():
+    """Build the recommendation engine once and share it across reruns and sessions"""
+    movies_df, ratings_df = load_data()
+    return RecommendationEngine(movies_df, ratings_df)
+
+@st.cache_data
+def load_search_index():
+    """Build and cache each movie's lowercase title and genres as one search column"""
+    movies_df, _ = load_data()
+    # Arrow-backed strings, so str.contains runs Arrow's compiled substring
+    # kernel over the whole column; \x1f keeps a search term from matching
+    # across the title/genres boundary
+    return (
+        movies_df['title'].astype('string[pyarrow]').fillna('').str.lower() + '\x1f'
+        + movies_df['genres'].astype('string[pyarrow]').fillna('').str.lower()
+    )
+
+def search_movies(movies_df, search_term):
+    """Find movies whose title or genres contain the search term (case-insensitive)"""
+    search_column = load_search_index()
+    # One literal substring scan over the combined column, no regex engine
+    matches = search_column.str.contains(search_term.lower(), regex=False, na=False)
+    return movies_df[matches.to_numpy(dtype=bool)]
+
 def main():
     # Header
     st.markdown('<h1 class="main-header">🎯 SmartSuggest</h1>', unsafe_allow_html=True)
@@ -55,7 +80,7 @@ def main():
     # Load data
     try:
         movies_df, ratings_df = load_data()
-        engine = RecommendationEngine(movies_df, ratings_df)
+        engine = get_engine()
         
         # Sidebar
         st.sidebar.header("🔧 Configuration")
@@ -91,10 +116,7 @@ def main():
                 search_term = st.text_input("🔍 Search for movies", "")
                 
                 if search_term:
-                    filtered_movies = movies_df[
-                        movies_df['title'].str.contains(search_term, case=False, na=False) |
-                        movies_df['genres'].str.contains(search_term, case=False, na=False)
-                    ]
+                    filtered_movies = search_movies(movies_df, search_term)
                 else:
                     filtered_movies = movies_df.head(20)
                 
@@ -121,15 +143,22 @@ def main():
                             # Display recommendations
                             st.subheader("🌟 Your Recommendations")
                             
-                            for idx, (_, movie) in enumerate(recommendations.iterrows(), 1):
-                                with st.container():
-                                    st.markdown(f"""
-                                    <div class="recommendation-card">
-                                        <h4>#{idx} {movie['title']} ({movie.get('year', 'N/A')})</h4>
-                                        <p><strong>Genres:</strong> {movie['genres']}</p>
-                                        <p class="similarity-score">Similarity Score: {movie.get('similarity_score', 0):.3f}</p>
-                                    </div>
-                                    """, unsafe_allow_html=True)
+                            table = (
+                                recommendations
+                                .reindex(columns=['title', 'year', 'genres', 'similarity_score'])
+                                .fillna({'year': 'N/A', 'similarity_score': 0})
+                                .set_axis(['Title', 'Year', 'Genres', 'Similarity Score'], axis=1)
+                                .rename_axis(columns='#')
+                            )
+                            table.index = pd.RangeIndex(1, len(table) + 1)
+                            table_html = (
+                                table.style
+                                .format({'Similarity Score': '{:.3f}'}, escape='html')
+                                .set_table_attributes('class="recommendation-card"')
+                                .set_table_styles([{'selector': 'th, td', 'props': 'padding: 0.4rem 0.8rem; text-align: left;'}])
+                                .to_html()
+                            )
+                            st.markdown(table_html, unsafe_allow_html=True)
                     else:
                         st.warning("Please select at least one movie to get recommendations.")
             
@@ -175,13 +204,15 @@ def main():
             
             # Genre distribution
             st.subheader("🎭 Genre Distribution")
-            genre_counts = {}
-            for genres_str in movies_df['genres'].dropna():
-                for genre in genres_str.split('|'):
-                    genre_counts[genre] = genre_counts.get(genre, 0) + 1
-            
-            genre_df = pd.DataFrame(list(genre_counts.items()), columns=['Genre', 'Count'])
-            genre_df = genre_df.sort_values('Count', ascending=False).head(10)
+            genre_df = (
+                movies_df['genres'].dropna()
+                .str.split('|')
+                .explode()
+                .value_counts()
+                .head(10)
+                .rename_axis('Genre')
+                .reset_index(name='Count')
+            )
             
             fig = px.bar(genre_df, x='Genre', y='Count', title="Top 10 Movie Genres")
             fig.update_layout(xaxis_tickangle=-45)
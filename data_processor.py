@@ -4,6 +4,13 @@ import requests
 import json
 import os
 
+# Parquet copies of the generated sample data, written on first use
+SAMPLE_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample_data')
+
+# Part of the cached file names; bump it whenever _build_sample_data changes
+# what it generates, so stale parquet copies are not reused
+SAMPLE_DATA_VERSION = 2
+
 class DataProcessor:
     def __init__(self):
         """
@@ -13,6 +20,29 @@ class DataProcessor:
         self.ratings_df = None
     
     def load_sample_data(self):
+        """
+        Load sample movie and rating data for demonstration
+        """
+        movies_path = os.path.join(SAMPLE_DATA_DIR, f'movies_v{SAMPLE_DATA_VERSION}.parquet')
+        ratings_path = os.path.join(SAMPLE_DATA_DIR, f'ratings_v{SAMPLE_DATA_VERSION}.parquet')
+        
+        if os.path.exists(movies_path) and os.path.exists(ratings_path):
+            self.movies_df = pd.read_parquet(movies_path)
+            self.ratings_df = pd.read_parquet(ratings_path)
+            return self.movies_df, self.ratings_df
+        
+        self._build_sample_data()
+        
+        try:
+            os.makedirs(SAMPLE_DATA_DIR, exist_ok=True)
+            self.movies_df.to_parquet(movies_path, index=False)
+            self.ratings_df.to_parquet(ratings_path, index=False)
+        except OSError as e:
+            print(f"Could not cache sample data: {e}")
+        
+        return self.movies_df, self.ratings_df
+    
+    def _build_sample_data(self):
         """
         Create sample movie and rating data for demonstration
         """
@@ -87,35 +117,62 @@ class DataProcessor:
         
         self.movies_df = pd.DataFrame(movies_data)
         
+        # Store titles and genres as contiguous Arrow strings, the same dtype
+        # load_from_csv produces (genres stay strings so fillna('') and the
+        # TF-IDF step work on them)
+        self.movies_df['title'] = self.movies_df['title'].astype('string[pyarrow]')
+        self.movies_df['genres'] = self.movies_df['genres'].astype('string[pyarrow]')
+        
         # Extract year from title (simplified approach)
         self.movies_df['year'] = np.random.randint(1990, 2024, size=len(self.movies_df))
         
         # Create sample ratings data
-        np.random.seed(42)  # For reproducible results
+        rng = np.random.default_rng(42)  # For reproducible results
         n_users = 1000
         n_ratings = 10000
         
+        # Draw ratings 1-5 by inverse-CDF lookup of uniforms instead of a
+        # weighted np.random.choice
+        rating_cdf = np.cumsum([0.05, 0.1, 0.2, 0.35, 0.3])
+        ratings = np.searchsorted(rating_cdf[:-1], rng.random(n_ratings), side='right') + 1
+        
         ratings_data = {
-            'userId': np.random.randint(1, n_users + 1, n_ratings),
-            'movieId': np.random.choice(self.movies_df['movieId'], n_ratings),
-            'rating': np.random.choice([1, 2, 3, 4, 5], n_ratings, p=[0.05, 0.1, 0.2, 0.35, 0.3]),
-            'timestamp': np.random.randint(1000000000, 1700000000, n_ratings)
+            'userId': rng.integers(1, n_users + 1, n_ratings),
+            'movieId': rng.choice(self.movies_df['movieId'].to_numpy(), n_ratings),
+            'rating': ratings.astype(np.int8),
+            'timestamp': rng.integers(1000000000, 1700000000, n_ratings)
         }
         
         self.ratings_df = pd.DataFrame(ratings_data)
         
-        # Remove duplicate user-movie combinations
-        self.ratings_df = self.ratings_df.drop_duplicates(subset=['userId', 'movieId'])
+        # Remove duplicate user-movie combinations, keeping the first rating.
+        # Both ids fit in 32 bits, so pack them into one int64 key and dedupe
+        # with a sort instead of hashing row tuples
+        pair_keys = (
+            (self.ratings_df['userId'].to_numpy().astype(np.int64) << 32)
+            | self.ratings_df['movieId'].to_numpy().astype(np.int64)
+        )
+        _, first_idx = np.unique(pair_keys, return_index=True)
+        self.ratings_df = self.ratings_df.iloc[np.sort(first_idx)].reset_index(drop=True)
         
-        return self.movies_df, self.ratings_df
+        # Narrowest types that hold the values: ratings are 1-5, ids fit in
+        # 32 bits and timestamps are unsigned seconds
+        self.ratings_df = self.ratings_df.astype({
+            'userId': 'int32',
+            'movieId': 'int32',
+            'rating': 'int8',
+            'timestamp': 'uint32'
+        })
     
     def load_from_csv(self, movies_path, ratings_path):
         """
         Load data from CSV files (MoviesLens format)
         """
         try:
-            self.movies_df = pd.read_csv(movies_path)
-            self.ratings_df = pd.read_csv(ratings_path)
+            # Parse with the multi-threaded Arrow reader straight into
+            # Arrow-backed columns
+            self.movies_df = pd.read_csv(movies_path, engine='pyarrow', dtype_backend='pyarrow')
+            self.ratings_df = pd.read_csv(ratings_path, engine='pyarrow', dtype_backend='pyarrow')
             
             # Ensure required columns exist
             required_movie_cols = ['movieId', 'title', 'genres']
@@ -151,9 +208,29 @@ class DataProcessor:
         # Clean ratings data
         self.ratings_df = self.ratings_df.dropna(subset=['userId', 'movieId', 'rating'])
         
-        # Remove ratings for movies not in movies dataframe
-        valid_movie_ids = self.movies_df['movieId'].unique()
-        self.ratings_df = self.ratings_df[self.ratings_df['movieId'].isin(valid_movie_ids)]
+        # Downcast to 32-bit ids; MovieLens ratings can be half-stars, so
+        # they stay floating point
+        rating_dtypes = {'userId': 'int32', 'movieId': 'int32', 'rating': 'float32', 'timestamp': 'uint32'}
+        self.ratings_df = self.ratings_df.astype(
+            {col: dtype for col, dtype in rating_dtypes.items() if col in self.ratings_df.columns}
+        )
+        
+        # Remove ratings for movies not in movies dataframe. Movie IDs are
+        # small positive integers, so test membership by indexing a boolean
+        # lookup array instead of hashing every ID
+        valid_movie_ids = self.movies_df['movieId'].to_numpy(dtype=np.int64)
+        rated_movie_ids = self.ratings_df['movieId'].to_numpy(dtype=np.int64)
+        is_valid = np.zeros(max(valid_movie_ids.max(initial=0), rated_movie_ids.max(initial=0)) + 1, dtype=bool)
+        is_valid[valid_movie_ids[valid_movie_ids >= 0]] = True
+        
+        # Negative IDs would wrap around to the end of the lookup array, so
+        # they are masked out before indexing and matched with np.isin instead
+        non_negative = rated_movie_ids >= 0
+        keep = non_negative.copy()
+        keep[non_negative] = is_valid[rated_movie_ids[non_negative]]
+        if not non_negative.all():
+            keep[~non_negative] = np.isin(rated_movie_ids[~non_negative], valid_movie_ids)
+        self.ratings_df = self.ratings_df[keep]
         
         # Ensure rating values are in valid range
         self.ratings_df = self.ratings_df[
@@ -162,6 +239,44 @@ class DataProcessor:
         
         return self.movies_df, self.ratings_df
     
+    @staticmethod
+    def summarize_ratings(ratings):
+        """
+        Get the mean rating and the rating distribution from a ratings Series
+        """
+        values = ratings.to_numpy()
+        
+        # Whole-star ratings: one bincount pass yields both the histogram
+        # and the mean
+        if values.dtype.kind in 'iu' and len(values) > 0 and values.min() >= 0:
+            counts = np.bincount(values, minlength=6)
+            rated = np.flatnonzero(counts)
+            avg_rating = float(np.dot(np.arange(len(counts)), counts) / counts.sum())
+            distribution = pd.Series(counts[rated], index=pd.Index(rated, name='rating'), name='count')
+            return avg_rating, distribution
+        
+        # Half-star (floating point) ratings
+        return float(ratings.mean()), ratings.value_counts().sort_index()
+    
+    @staticmethod
+    def movie_rating_stats(ratings_df):
+        """
+        Get each movie's mean rating and rating count, ordered by movieId,
+        from one pair of bincount passes over the ratings
+        """
+        codes, movie_ids = pd.factorize(ratings_df['movieId'].to_numpy(), sort=True)
+        ratings = ratings_df['rating'].to_numpy(np.float64)
+        has_id = codes >= 0
+        
+        counts = np.bincount(codes[has_id], minlength=len(movie_ids))
+        sums = np.bincount(codes[has_id], weights=ratings[has_id], minlength=len(movie_ids))
+        
+        return pd.DataFrame({
+            'movieId': movie_ids,
+            'mean': sums / np.maximum(counts, 1),
+            'count': counts
+        })
+    
     def get_data_statistics(self):
         """
         Get basic statistics about the loaded data
@@ -169,13 +284,17 @@ class DataProcessor:
         if self.movies_df is None or self.ratings_df is None:
             return None
         
+        avg_rating, rating_distribution = self.summarize_ratings(self.ratings_df['rating'])
+        # Sort-based distinct count over the contiguous int32 ID array
+        n_users = int(np.unique(self.ratings_df['userId'].to_numpy()).size)
+        
         stats = {
             'n_movies': len(self.movies_df),
             'n_ratings': len(self.ratings_df),
-            'n_users': self.ratings_df['userId'].nunique(),
-            'avg_rating': self.ratings_df['rating'].mean(),
-            'rating_distribution': self.ratings_df['rating'].value_counts().sort_index(),
-            'sparsity': 1 - (len(self.ratings_df) / (self.ratings_df['userId'].nunique() * len(self.movies_df)))
+            'n_users': n_users,
+            'avg_rating': avg_rating,
+            'rating_distribution': rating_distribution,
+            'sparsity': 1 - (len(self.ratings_df) / (n_users * len(self.movies_df)))
         }
         
         return stats
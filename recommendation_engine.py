@@ -1,12 +1,35 @@
 import pandas as pd
 import numpy as np
+from scipy.sparse import csr_matrix
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.neighbors import NearestNeighbors
 from sklearn.decomposition import TruncatedSVD
+from recommender_kernels import batch_cos_topk, l2_normalize_rows, top_k_indices
+from data_processor import DataProcessor
+import joblib
+import os
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import simsimd
+except ImportError:  # optional: SIMD cosine kernels for dense float32 vectors
+    simsimd = None
+
+try:
+    import hnswlib
+except ImportError:  # optional: approximate nearest-neighbour index for large catalogs
+    hnswlib = None
+
+# Largest matrix (in cells) kept as a dense float32 copy for the cosine kernels
+DENSE_COSINE_MAX_CELLS = 50_000_000
+
+# Smallest catalog served from an HNSW index; below it exact brute force is as fast
+ANN_MIN_MOVIES = 10_000
+
+# Layout of the state save() persists; bump it whenever _prepare_data adds,
+# removes or changes an attribute, so older saved engines are rebuilt
+ENGINE_CACHE_VERSION = 2
+
 class RecommendationEngine:
     def __init__(self, movies_df, ratings_df):
         """
@@ -14,31 +37,123 @@ class RecommendationEngine:
         """
         self.movies_df = movies_df.copy()
         self.ratings_df = ratings_df.copy()
-        self.user_item_matrix = None
-        self.content_similarity_matrix = None
+        self.user_item_csr = None
+        self.movie_item_csr = None
+        self.tfidf_matrix = None
+        self.tfidf_dense = None
+        self.svd = None
+        self.movie_embeddings = None
+        self.ann_index = None
         self.tfidf_vectorizer = None
-        self.knn_model = None
         
         # Prepare data
         self._prepare_data()
     
+    @staticmethod
+    def _fingerprint(movies_df, ratings_df):
+        """
+        Cheap identity of the input data, the saved-state layout and the
+        optional accelerators the state depends on, used to tell whether a
+        saved engine can be reused as-is
+        """
+        max_timestamp = 0
+        if 'timestamp' in ratings_df.columns and len(ratings_df) > 0:
+            max_timestamp = int(ratings_df['timestamp'].max())
+        return (
+            ENGINE_CACHE_VERSION,
+            simsimd is not None,  # decides whether tfidf_dense is built
+            hnswlib is not None,  # decides whether ann_index is built
+            len(movies_df),
+            len(ratings_df),
+            max_timestamp
+        )
+    
+    def save(self, path):
+        """
+        Save the prepared matrices and fitted models, so that load() can skip
+        rebuilding them for the same data
+        """
+        state = {
+            name: value for name, value in vars(self).items()
+            if name not in ('movies_df', 'ratings_df')
+        }
+        joblib.dump(
+            {'fingerprint': self._fingerprint(self.movies_df, self.ratings_df), 'state': state},
+            path,
+            compress=3
+        )
+    
+    @classmethod
+    def load(cls, path, movies_df, ratings_df):
+        """
+        Load an engine saved for this data without re-running _prepare_data.
+        Returns None if there is no saved engine or it was built from other
+        data, by another cache version or with other optional accelerators.
+        """
+        if not os.path.exists(path):
+            return None
+        
+        try:
+            saved = joblib.load(path)
+        except Exception as e:
+            print(f"Could not load saved engine: {e}")
+            return None
+        
+        if saved.get('fingerprint') != cls._fingerprint(movies_df, ratings_df):
+            return None
+        
+        engine = cls.__new__(cls)
+        engine.movies_df = movies_df.copy()
+        engine.ratings_df = ratings_df.copy()
+        engine.__dict__.update(saved['state'])
+        
+        # Fill missing genres, as _prepare_content_features does
+        engine.movies_df['genres'] = engine.movies_df['genres'].fillna('')
+        return engine
+    
     def _prepare_data(self):
         """
         Prepare data for recommendation algorithms
         """
-        # Create user-item matrix for collaborative filtering
-        self.user_item_matrix = self.ratings_df.pivot_table(
-            index='userId',
-            columns='movieId', 
-            values='rating',
-            fill_value=0
+        # Dense movieId -> row position lookup, so hot paths index an array
+        # instead of scanning movies_df with a boolean mask
+        movie_ids = self.movies_df['movieId'].to_numpy(dtype=np.int64)
+        self._movie_row = np.full(movie_ids.max() + 1 if len(movie_ids) else 0, -1, dtype=np.int32)
+        self._movie_row[movie_ids] = np.arange(len(movie_ids), dtype=np.int32)
+        
+        # Create a sparse user-item matrix for collaborative filtering. Rows
+        # and columns follow the sorted user and movie IDs, like pivot_table
+        user_codes, user_ids = pd.factorize(self.ratings_df['userId'].to_numpy(), sort=True)
+        movie_codes, rated_movie_ids = pd.factorize(self.ratings_df['movieId'].to_numpy(), sort=True)
+        shape = (len(user_ids), len(rated_movie_ids))
+        self.user_item_csr = csr_matrix(
+            (self.ratings_df['rating'].to_numpy(np.float32), (user_codes, movie_codes)),
+            shape=shape
         )
+        if self.user_item_csr.nnz < len(user_codes):
+            # Average repeated (user, movie) ratings, as pivot_table does
+            rating_counts = csr_matrix(
+                (np.ones(len(user_codes), dtype=np.float32), (user_codes, movie_codes)),
+                shape=shape
+            )
+            self.user_item_csr.data /= rating_counts.data
+        self.movie_item_csr = self.user_item_csr.T.tocsr()
+        
+        # userId -> matrix row, movieId -> matrix column, and back
+        self._user_row = dict(zip(user_ids.tolist(), range(len(user_ids))))
+        self._movie_col = dict(zip(rated_movie_ids.tolist(), range(len(rated_movie_ids))))
+        self._col_movie_ids = np.asarray(rated_movie_ids)
         
         # Prepare content-based features
         self._prepare_content_features()
         
         # Prepare collaborative filtering model
         self._prepare_collaborative_model()
+        
+        # Rank the popularity fallback once; every fallback is then a head(n)
+        self._popular_sorted = self._rank_popular_movies()
+        self._popular_rows = self._movie_rows(self._popular_sorted['movieId'])
+        self._popular_scores = self._popular_sorted['similarity_score'].to_numpy(np.float32)
     
     def _prepare_content_features(self):
         """
@@ -47,52 +162,199 @@ class RecommendationEngine:
         # Fill missing genres
         self.movies_df['genres'] = self.movies_df['genres'].fillna('')
         
-        # Create TF-IDF vectors from genres
-        self.tfidf_vectorizer = TfidfVectorizer(stop_words='english')
-        tfidf_matrix = self.tfidf_vectorizer.fit_transform(self.movies_df['genres'])
+        # Genre universe and per-movie genre sets, parsed once for the
+        # diversity metric and similarity explanations
+        genres = self.movies_df['genres'].str.split('|').explode()
+        self.all_genres = set(genres[genres != ''])
+        self.n_all_genres = len(self.all_genres)
+        self.movie_genre_sets = [set(g.split('|')) if g else set() for g in self.movies_df['genres'].tolist()]
+        
+        # Create TF-IDF vectors from genres (float32 is plenty for cosine and
+        # halves the bytes every similarity query reads)
+        self.tfidf_vectorizer = TfidfVectorizer(stop_words='english', dtype=np.float32)
+        self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(self.movies_df['genres'])
         
-        # Calculate cosine similarity matrix
-        self.content_similarity_matrix = cosine_similarity(tfidf_matrix)
+        # With SimSIMD available, keep a dense float32 copy (genre vocabularies
+        # are small) so queries run through its SIMD cosine kernel
+        if simsimd is not None and np.prod(self.tfidf_matrix.shape) <= DENSE_COSINE_MAX_CELLS:
+            self.tfidf_dense = np.ascontiguousarray(self.tfidf_matrix.toarray(), dtype=np.float32)
     
     def _prepare_collaborative_model(self):
         """
-        Prepare KNN model for collaborative filtering
+        Prepare movie embeddings for collaborative filtering
+        """
+        # Only fit if we have enough data. Movies are rows for item-based
+        # collaborative filtering
+        n_movies, n_users = self.movie_item_csr.shape
+        if n_movies > 0:
+            # Factor each movie's rating vector down to at most 64 components,
+            # so a similarity query reads k floats per movie instead of n_users
+            n_components = min(64, n_users - 1, n_movies)
+            if n_components > 0:
+                self.svd = TruncatedSVD(n_components=n_components, random_state=0)
+                embeddings = self.svd.fit_transform(self.movie_item_csr)
+            else:
+                embeddings = self.movie_item_csr.toarray()
+            
+            # Unit-length float32 rows, ready for the batched cosine top-k kernel
+            self.movie_embeddings = l2_normalize_rows(embeddings)
+            
+            # Large catalogs get an HNSW graph for sub-linear neighbour queries
+            if hnswlib is not None and n_movies >= ANN_MIN_MOVIES:
+                self.ann_index = hnswlib.Index(space='cosine', dim=self.movie_embeddings.shape[1])
+                self.ann_index.init_index(max_elements=n_movies, ef_construction=200, M=16, random_seed=0)
+                self.ann_index.add_items(self.movie_embeddings, np.arange(n_movies))
+                self.ann_index.set_ef(64)
+    
+    def _collab_neighbors(self, movie_cols, n_neighbors):
+        """
+        Find the movies with the most similar rating embeddings for a batch
+        of user-item columns, as (indices, similarities) of shape
+        (len(movie_cols), n_neighbors), most similar first
+        """
+        if self.ann_index is not None:
+            labels, distances = self.ann_index.knn_query(self.movie_embeddings[movie_cols], k=n_neighbors)
+            return labels.astype(np.int64), 1 - distances  # Convert distance to similarity
+        
+        return batch_cos_topk(self.movie_embeddings, self.movie_embeddings[movie_cols], n_neighbors)
+    
+    @staticmethod
+    def _is_movie_id(value):
+        """
+        Check that a value is a genuine integer ID (not a bool, float or string)
+        """
+        return isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_))
+    
+    def _movie_rows(self, movie_ids):
+        """
+        Map movie IDs to row positions in movies_df (-1 for unknown IDs and for
+        values that are not integers, e.g. 1.5 or '1')
         """
-        # Use matrix with movies as rows for item-based collaborative filtering
-        movie_item_matrix = self.user_item_matrix.T
+        ids = np.asarray(movie_ids)
+        if ids.dtype.kind not in 'iu':
+            # Mixed or non-integer input: look up only the genuine integers
+            values = np.asarray(movie_ids, dtype=object).ravel()
+            ids = np.array(
+                [v if self._is_movie_id(v) and 0 <= v < len(self._movie_row) else -1 for v in values],
+                dtype=np.int64
+            ).reshape(ids.shape)
+        movie_ids = ids
+        rows = np.full(movie_ids.shape, -1, dtype=np.int32)
+        known = (movie_ids >= 0) & (movie_ids < len(self._movie_row))
+        rows[known] = self._movie_row[movie_ids[known]]
+        return rows
+    
+    @staticmethod
+    def _simsimd_top_k(vectors, query_idx, k):
+        """
+        Get the k rows of a dense float32 matrix most cosine-similar to one of
+        its rows using SimSIMD, as (indices, similarities) sorted by similarity
+        """
+        # cdist returns float64 distances; keep scores float32 like the other paths
+        similarities = 1 - np.asarray(
+            simsimd.cdist(vectors[query_idx:query_idx + 1], vectors, metric='cosine'),
+            dtype=np.float32
+        ).ravel()
+        if not vectors[query_idx].any():
+            # Match sklearn: a zero vector is dissimilar to everything
+            similarities[:] = 0
         
-        # Fit KNN model
-        self.knn_model = NearestNeighbors(
-            metric='cosine',
-            algorithm='brute',
-            n_neighbors=20
+        top = top_k_indices(similarities, k)
+        return top, similarities[top]
+    
+    @staticmethod
+    def _top_k_movies(rows, scores, k, combine):
+        """
+        Merge the scores of repeated movie rows with a ufunc (e.g. np.maximum)
+        and return the k best (rows, scores), best first. Rows of -1 are dropped.
+        """
+        is_known = rows >= 0
+        rows, scores = rows[is_known], scores[is_known]
+        if len(rows) == 0:
+            return rows, scores
+        
+        order = np.argsort(rows, kind='stable')
+        rows, scores = rows[order], scores[order]
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        rows, scores = rows[starts], combine.reduceat(scores, starts)
+        
+        top = top_k_indices(scores, k)
+        return rows[top], scores[top]
+    
+    def _content_topk(self, movie_id, k):
+        """
+        Get the k movies most similar in content to a movie, as (rows,
+        similarities) arrays sorted by similarity. Raises IndexError for an
+        unknown movie.
+        """
+        # Find movie index in the dataframe. Anything that cannot be mapped
+        # (wrong type, nested list, unknown ID) raises IndexError, which
+        # every caller treats as an unknown movie
+        movie_idx = self._movie_rows([movie_id])[0] if self._is_movie_id(movie_id) else -1
+        if movie_idx < 0:
+            raise IndexError(movie_id)
+        
+        # Get the most similar movies, sorted by similarity
+        n_neighbors = min(k + 1, self.tfidf_matrix.shape[0])
+        if self.tfidf_dense is not None:
+            indices, similarities = self._simsimd_top_k(self.tfidf_dense, movie_idx, n_neighbors)
+        else:
+            # TF-IDF rows are L2-normalized, so one sparse matvec gives the
+            # cosine similarity to every movie
+            similarities = (self.tfidf_matrix @ self.tfidf_matrix[movie_idx].T).toarray().ravel()
+            indices = top_k_indices(similarities, n_neighbors)
+            similarities = similarities[indices]
+        
+        # Exclude the movie itself
+        is_other = indices != movie_idx
+        return indices[is_other][:k], similarities[is_other][:k]
+    
+    def _collab_topk(self, movie_ids, k):
+        """
+        Get the k movies whose rating patterns best match any of the given
+        movies, as (rows, similarities) arrays sorted by similarity. Both are
+        empty when none of the movies has ratings.
+        """
+        # Find movie columns in the user-item matrix
+        movie_cols = np.array(
+            [
+                self._movie_col[movie_id] for movie_id in movie_ids
+                if self._is_movie_id(movie_id) and movie_id in self._movie_col
+            ],
+            dtype=np.int64
         )
+        if len(movie_cols) == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
         
-        # Only fit if we have enough data
-        if movie_item_matrix.shape[0] > 0:
-            self.knn_model.fit(movie_item_matrix.values)
+        # Get similar movies for all input movies in one batch
+        n_neighbors = min(k + 1, self.movie_item_csr.shape[0])
+        neighbor_cols, neighbor_sims = self._collab_neighbors(movie_cols, n_neighbors)
+        
+        # Keep the first k neighbours of each input movie, excluding the
+        # input movie itself
+        is_other = neighbor_cols != movie_cols[:, None]
+        keep = is_other & (np.cumsum(is_other, axis=1) <= k)
+        rows = self._movie_rows(self._col_movie_ids[neighbor_cols[keep]])
+        
+        # Remove duplicates (keeping each movie's best score) and sort
+        return self._top_k_movies(rows, neighbor_sims[keep], k, np.maximum)
+    
+    def _popular_topk(self, k):
+        """
+        Get the k most popular movies as (rows, scores) arrays
+        """
+        return self._popular_rows[:k], self._popular_scores[:k]
     
     def content_based_recommendations(self, movie_id, n_recommendations=10):
         """
         Generate content-based recommendations for a given movie
         """
         try:
-            # Find movie index in the dataframe
-            movie_idx = self.movies_df[self.movies_df['movieId'] == movie_id].index[0]
-            
-            # Get similarity scores
-            similarity_scores = list(enumerate(self.content_similarity_matrix[movie_idx]))
-            
-            # Sort by similarity (excluding the movie itself)
-            similarity_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)[1:n_recommendations+1]
-            
-            # Get movie indices
-            movie_indices = [i[0] for i in similarity_scores]
-            similarity_values = [i[1] for i in similarity_scores]
+            rows, similarities = self._content_topk(movie_id, n_recommendations)
             
             # Get recommended movies
-            recommendations = self.movies_df.iloc[movie_indices].copy()
-            recommendations['similarity_score'] = similarity_values
+            recommendations = self.movies_df.iloc[rows].copy()
+            recommendations['similarity_score'] = similarities
             
             return recommendations
             
@@ -105,41 +367,13 @@ class RecommendationEngine:
         Generate collaborative filtering recommendations based on multiple movies
         """
         try:
-            recommendations_list = []
-            
-            for movie_id in movie_ids:
-                if movie_id in self.user_item_matrix.columns:
-                    # Find movie index in user_item_matrix
-                    movie_idx = list(self.user_item_matrix.columns).index(movie_id)
-                    
-                    # Get similar movies using KNN
-                    distances, indices = self.knn_model.kneighbors(
-                        [self.user_item_matrix.T.iloc[movie_idx].values],
-                        n_neighbors=min(n_recommendations + 1, len(self.user_item_matrix.columns))
-                    )
-                    
-                    # Get similar movie IDs (excluding the input movie)
-                    similar_movie_indices = indices.flatten()[1:]
-                    similarity_scores = 1 - distances.flatten()[1:]  # Convert distance to similarity
-                    
-                    # Get movie IDs
-                    similar_movie_ids = [self.user_item_matrix.columns[idx] for idx in similar_movie_indices]
-                    
-                    for i, movie_id in enumerate(similar_movie_ids):
-                        movie_info = self.movies_df[self.movies_df['movieId'] == movie_id]
-                        if not movie_info.empty:
-                            movie_data = movie_info.iloc[0].to_dict()
-                            movie_data['similarity_score'] = similarity_scores[i]
-                            recommendations_list.append(movie_data)
-            
-            # Remove duplicates and sort by similarity score
-            recommendations_df = pd.DataFrame(recommendations_list)
-            if not recommendations_df.empty:
-                recommendations_df = recommendations_df.drop_duplicates(subset=['movieId'])
-                recommendations_df = recommendations_df.sort_values('similarity_score', ascending=False)
-                return recommendations_df.head(n_recommendations)
-            else:
+            rows, scores = self._collab_topk(movie_ids, n_recommendations)
+            if len(rows) == 0:
                 return self._get_popular_movies(n_recommendations)
+            
+            recommendations = self.movies_df.iloc[rows].copy()
+            recommendations['similarity_score'] = scores
+            return recommendations
                 
         except Exception as e:
             print(f"Error in collaborative filtering: {e}")
@@ -149,47 +383,47 @@ class RecommendationEngine:
         """
         Generate hybrid recommendations combining content-based and collaborative filtering
         """
-        hybrid_scores = {}
+        n_candidates = n_recommendations * 2
         
-        # Get content-based recommendations
+        # Get content-based candidates (popular movies if the movie is unknown)
+        content_rows = np.empty(0, dtype=np.int32)
+        content_scores = np.empty(0, dtype=np.float32)
         if movie_ids:
-            content_recs = self.content_based_recommendations(movie_ids[0], n_recommendations * 2)
-            for _, movie in content_recs.iterrows():
-                movie_id = movie['movieId']
-                hybrid_scores[movie_id] = hybrid_scores.get(movie_id, 0) + (
-                    content_weight * movie['similarity_score']
-                )
-        
-        # Get collaborative filtering recommendations
-        collab_recs = self.collaborative_filtering_recommendations(movie_ids, n_recommendations * 2)
-        if not collab_recs.empty:
-            for _, movie in collab_recs.iterrows():
-                movie_id = movie['movieId']
-                hybrid_scores[movie_id] = hybrid_scores.get(movie_id, 0) + (
-                    collab_weight * movie['similarity_score']
-                )
-        
-        # Sort by hybrid score
-        sorted_movies = sorted(hybrid_scores.items(), key=lambda x: x[1], reverse=True)
-        top_movie_ids = [movie_id for movie_id, _ in sorted_movies[:n_recommendations]]
-        
-        # Get movie details
-        recommendations = []
-        for movie_id in top_movie_ids:
-            movie_info = self.movies_df[self.movies_df['movieId'] == movie_id]
-            if not movie_info.empty:
-                movie_data = movie_info.iloc[0].to_dict()
-                movie_data['similarity_score'] = hybrid_scores[movie_id]
-                recommendations.append(movie_data)
-        
-        return pd.DataFrame(recommendations) if recommendations else self._get_popular_movies(n_recommendations)
+            try:
+                content_rows, content_scores = self._content_topk(movie_ids[0], n_candidates)
+            except IndexError:
+                content_rows, content_scores = self._popular_topk(n_candidates)
+        
+        # Get collaborative filtering candidates, with the same fallback
+        try:
+            collab_rows, collab_scores = self._collab_topk(movie_ids, n_candidates)
+        except Exception as e:
+            print(f"Error in collaborative filtering: {e}")
+            collab_rows = np.empty(0, dtype=np.int32)
+        if len(collab_rows) == 0:
+            collab_rows, collab_scores = self._popular_topk(n_candidates)
+        
+        # Sum the weighted scores of each movie and keep the best
+        rows, scores = self._top_k_movies(
+            np.concatenate([content_rows, collab_rows]),
+            np.concatenate([content_weight * content_scores, collab_weight * collab_scores]),
+            n_recommendations,
+            np.add
+        )
+        if len(rows) == 0:
+            return self._get_popular_movies(n_recommendations)
+        
+        # Get movie details with one positional lookup
+        recommendations = self.movies_df.iloc[rows].reset_index(drop=True)
+        recommendations['similarity_score'] = scores
+        return recommendations
     
-    def _get_popular_movies(self, n_recommendations=10):
+    def _rank_popular_movies(self):
         """
-        Get popular movies as fallback recommendations
+        Rank every movie with at least 10 ratings by its average rating
         """
         # Calculate average ratings
-        avg_ratings = self.ratings_df.groupby('movieId')['rating'].agg(['mean', 'count']).reset_index()
+        avg_ratings = DataProcessor.movie_rating_stats(self.ratings_df)
         avg_ratings = avg_ratings[avg_ratings['count'] >= 10]  # At least 10 ratings
         
         # Merge with movie details
@@ -197,26 +431,52 @@ class RecommendationEngine:
         popular_movies = popular_movies.sort_values('mean', ascending=False)
         
         # Add similarity score for consistency
-        popular_movies['similarity_score'] = popular_movies['mean'] / 5.0  # Normalize to 0-1
+        popular_movies['similarity_score'] = (popular_movies['mean'] / 5.0).astype(np.float32)  # Normalize to 0-1
         
-        return popular_movies.head(n_recommendations)
+        return popular_movies
+    
+    def _get_popular_movies(self, n_recommendations=10):
+        """
+        Get popular movies as fallback recommendations
+        """
+        return self._popular_sorted.head(n_recommendations).copy()
     
     def get_user_recommendations(self, user_id, n_recommendations=10):
         """
         Get recommendations for a specific user based on their rating history
         """
-        if user_id not in self.user_item_matrix.index:
+        user_idx = self._user_row.get(user_id)
+        if user_idx is None:
             return self._get_popular_movies(n_recommendations)
         
-        # Get user's ratings
-        user_ratings = self.user_item_matrix.loc[user_id]
-        rated_movies = user_ratings[user_ratings > 0].index.tolist()
+        # Get user's ratings: the stored entries of their CSR row, read as
+        # views of the index/data arrays without building a 1-row matrix
+        start, end = self.user_item_csr.indptr[user_idx], self.user_item_csr.indptr[user_idx + 1]
+        rated_cols = self.user_item_csr.indices[start:end]
+        ratings = self.user_item_csr.data[start:end]
         
         # Get highly rated movies by the user
-        high_rated_movies = user_ratings[user_ratings >= 4.0].index.tolist()
+        liked_cols = rated_cols[ratings >= 4.0]
+        if len(liked_cols) == 0:
+            return self._get_popular_movies(n_recommendations)
         
-        if high_rated_movies:
-            # Use collaborative filtering based on highly rated movies
-            return self.collaborative_filtering_recommendations(high_rated_movies, n_recommendations)
-        else:
-            return self._get_popular_movies(n_recommendations)
\ No newline at end of file
+        # Score every movie by its mean cosine similarity to the liked movies.
+        # The embeddings are unit-length, so this is one matvec against the
+        # user's averaged profile instead of a neighbour query per liked movie
+        profile = self.movie_embeddings[liked_cols].mean(axis=0)
+        scores = self.movie_embeddings @ profile
+        
+        # Only recommend movies the user has not rated yet
+        unrated = np.ones(len(scores), dtype=bool)
+        unrated[rated_cols] = False
+        candidate_cols = np.flatnonzero(unrated)
+        rows = self._movie_rows(self._col_movie_ids[candidate_cols])
+        is_known = rows >= 0
+        rows, scores = rows[is_known], scores[candidate_cols[is_known]]
+        if len(rows) == 0:
+            return self._get_popular_movies(n_recommendations)
+        
+        top = top_k_indices(scores, n_recommendations)
+        recommendations = self.movies_df.iloc[rows[top]].copy()
+        recommendations['similarity_score'] = scores[top]
+        return recommendations
\ No newline at end of file
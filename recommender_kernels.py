@@ -0,0 +1,85 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # optional: compiled kernels, NumPy fallbacks otherwise
+    njit = None
+
+
+def l2_normalize_rows(matrix):
+    """
+    Scale each row of a dense matrix to unit L2 norm (zero rows stay zero)
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def top_k_indices(scores, k):
+    """
+    Get the indices of the k highest scores, highest first, with ties going
+    to the lowest index. O(n) selection finds the k-th score; only the
+    candidates scoring at least that much are sorted.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Every index tied at the cut-off is a candidate, so the choice among
+    # equal scores does not depend on argpartition's internal order
+    kth_score = np.partition(scores, len(scores) - k)[len(scores) - k]
+    candidates = np.flatnonzero(scores >= kth_score)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order[:k]]
+
+
+def _batch_cos_topk_numpy(M_norm, Q_norm, k):
+    scores = Q_norm @ M_norm.T
+    top = np.array([top_k_indices(row, k) for row in scores], dtype=np.int64).reshape(len(scores), k)
+    return top, np.take_along_axis(scores, top, axis=1)
+
+
+if njit is not None:
+    # Serial on purpose: a batch is only the few movies one request selected,
+    # and parallel kernels are not safe to call from the server's request
+    # threads under Numba's fallback workqueue threading layer. The fastmath
+    # flags leave out nnan/ninf, and the top-k buffer is seeded with -2.0
+    # (below any cosine) rather than -inf.
+    @njit(fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'}, cache=True)
+    def _batch_cos_topk_numba(M_norm, Q_norm, k):
+        n_queries = Q_norm.shape[0]
+        top_idx = np.full((n_queries, k), -1, dtype=np.int64)
+        top_sim = np.full((n_queries, k), -2.0, dtype=np.float32)
+
+        for q in range(n_queries):
+            scores = M_norm @ Q_norm[q]
+
+            # Insertion into a sorted k-slot buffer; earlier rows win ties
+            for i in range(scores.shape[0]):
+                score = scores[i]
+                if score > top_sim[q, k - 1]:
+                    j = k - 1
+                    while j > 0 and top_sim[q, j - 1] < score:
+                        top_sim[q, j] = top_sim[q, j - 1]
+                        top_idx[q, j] = top_idx[q, j - 1]
+                        j -= 1
+                    top_sim[q, j] = score
+                    top_idx[q, j] = i
+
+        return top_idx, top_sim
+
+
+def batch_cos_topk(M_norm, Q_norm, k):
+    """
+    Find the k rows of M_norm most cosine-similar to each row of Q_norm.
+    Both must be L2-normalized float32 matrices. Returns (indices,
+    similarities), each of shape (n_queries, k), most similar first.
+    """
+    M_norm = np.ascontiguousarray(M_norm, dtype=np.float32)
+    Q_norm = np.ascontiguousarray(Q_norm, dtype=np.float32)
+    k = min(k, M_norm.shape[0])
+
+    if njit is not None:
+        return _batch_cos_topk_numba(M_norm, Q_norm, k)
+    return _batch_cos_topk_numpy(M_norm, Q_norm, k)
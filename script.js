@@ -20,7 +20,7 @@ class RecommendationSystem {
         try {
             const response = await fetch('/api/movies');
             if (response.ok) {
-                this.movies = await response.json();
+                this.movies = this.columnsToRecords(await response.json());
             } else {
                 // Fallback to sample data if API is not available
                 this.movies = this.getSampleMovies();
@@ -31,6 +31,19 @@ class RecommendationSystem {
         }
     }
 
+    columnsToRecords(columns) {
+        // /api/movies sends one array per column; rebuild row objects
+        const fields = Object.keys(columns);
+        const length = fields.length ? columns[fields[0]].length : 0;
+        return Array.from({ length }, (_, i) => {
+            const record = {};
+            fields.forEach(field => {
+                record[field] = columns[field][i];
+            });
+            return record;
+        });
+    }
+
     getSampleMovies() {
         return [
             { movieId: 1, title: "The Shawshank Redemption", genres: "Drama", year: 1994 },
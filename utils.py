@@ -1,8 +1,13 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import re
 import matplotlib.pyplot as plt
 import seaborn as sns
+from data_processor import DataProcessor
+
+# Year in parentheses at the end of a title, e.g. "Heat (1995)"
+_YEAR_RE = re.compile(r'\((\d{4})\)\s*$')
 
 class RecommendationUtils:
     """
@@ -10,22 +15,22 @@ class RecommendationUtils:
     """
     
     @staticmethod
-    def calculate_diversity(recommendations, movies_df):
+    def calculate_diversity(recommendations, movies_df, n_all_genres=None):
         """
-        Calculate diversity of recommendations based on genres
+        Calculate diversity of recommendations based on genres. Pass
+        n_all_genres (e.g. engine.n_all_genres) to skip re-parsing movies_df.
         """
         if recommendations.empty:
             return 0.0
         
         # Get genres for recommended movies
-        rec_genres = []
-        for _, movie in recommendations.iterrows():
-            genres = movie['genres'].split('|') if pd.notna(movie['genres']) else []
-            rec_genres.extend(genres)
+        rec_genres = recommendations['genres'].dropna().str.split('|').explode()
         
         # Calculate unique genres ratio
-        unique_genres = len(set(rec_genres))
-        total_possible_genres = len(set('|'.join(movies_df['genres'].dropna()).split('|')))
+        unique_genres = rec_genres[rec_genres != ''].nunique()
+        if n_all_genres is None:
+            n_all_genres = len({g for genres in movies_df['genres'].dropna() for g in genres.split('|') if g})
+        total_possible_genres = n_all_genres
         
         return unique_genres / total_possible_genres if total_possible_genres > 0 else 0.0
     
@@ -40,25 +45,22 @@ class RecommendationUtils:
         # Calculate movie popularity (number of ratings)
         movie_popularity = ratings_df.groupby('movieId').size()
         
-        novelty_scores = []
-        for _, movie in recommendations.iterrows():
-            movie_id = movie['movieId']
-            popularity = movie_popularity.get(movie_id, 0)
-            # Higher novelty for less popular movies
-            novelty = 1 / (1 + np.log(popularity + 1))
-            novelty_scores.append(novelty)
+        popularity = movie_popularity.reindex(recommendations['movieId']).fillna(0).to_numpy()
+        
+        # Higher novelty for less popular movies
+        novelty_scores = 1 / (1 + np.log(popularity + 1))
         
-        return np.mean(novelty_scores) if novelty_scores else 0.0
+        return novelty_scores.mean()
     
     @staticmethod
-    def evaluate_recommendations(recommendations, test_ratings, movies_df):
+    def evaluate_recommendations(recommendations, test_ratings, movies_df, n_all_genres=None):
         """
         Evaluate recommendation quality
         """
         metrics = {}
         
         # Diversity
-        metrics['diversity'] = RecommendationUtils.calculate_diversity(recommendations, movies_df)
+        metrics['diversity'] = RecommendationUtils.calculate_diversity(recommendations, movies_df, n_all_genres)
         
         # Novelty
         metrics['novelty'] = RecommendationUtils.calculate_novelty(recommendations, test_ratings)
@@ -90,31 +92,33 @@ class RecommendationUtils:
         if pd.isna(title):
             return None
         
-        try:
-            # Look for year in parentheses at the end
-            if '(' in title and ')' in title:
-                year_part = title.split('(')[-1].split(')')[0]
-                year = int(year_part)
-                if 1900 <= year <= 2030:  # Reasonable year range
-                    return year
-        except:
-            pass
+        # Look for year in parentheses at the end
+        match = _YEAR_RE.search(title)
+        if match:
+            year = int(match.group(1))
+            if 1900 <= year <= 2030:  # Reasonable year range
+                return year
         
         return None
     
+    @staticmethod
+    def extract_years(titles):
+        """
+        Extract years from a Series of titles in one vectorized pass
+        (nullable Int64, <NA> where there is no reasonable year)
+        """
+        years = pd.to_numeric(titles.str.extract(_YEAR_RE, expand=False)).astype('Int64')
+        return years.where(years.between(1900, 2030))
+    
     @staticmethod
     def get_genre_distribution(movies_df):
         """
         Get distribution of genres in the dataset
         """
-        genre_counts = {}
-        
-        for genres_str in movies_df['genres'].dropna():
-            for genre in genres_str.split('|'):
-                if genre.strip():  # Ignore empty genres
-                    genre_counts[genre] = genre_counts.get(genre, 0) + 1
+        genres = movies_df['genres'].dropna().str.split('|').explode()
+        genres = genres[genres.str.strip() != '']  # Ignore empty genres
         
-        return dict(sorted(genre_counts.items(), key=lambda x: x[1], reverse=True))
+        return genres.value_counts().to_dict()
     
     @staticmethod
     def create_user_profile(user_ratings, movies_df):
@@ -127,29 +131,19 @@ class RecommendationUtils:
         # Merge ratings with movie information
         user_movies = user_ratings.merge(movies_df, on='movieId')
         
-        # Calculate genre preferences
-        genre_ratings = {}
-        genre_counts = {}
-        
-        for _, movie in user_movies.iterrows():
-            rating = movie['rating']
-            genres = movie['genres'].split('|') if pd.notna(movie['genres']) else []
-            
-            for genre in genres:
-                if genre.strip():
-                    genre_ratings[genre] = genre_ratings.get(genre, 0) + rating
-                    genre_counts[genre] = genre_counts.get(genre, 0) + 1
-        
-        # Calculate average rating per genre
-        genre_preferences = {}
-        for genre in genre_ratings:
-            genre_preferences[genre] = genre_ratings[genre] / genre_counts[genre]
+        # Calculate average rating per genre, one row per (rating, genre) pair
+        exploded = user_movies.assign(genre=user_movies['genres'].str.split('|')).explode('genre')
+        exploded = exploded[exploded['genre'].notna() & (exploded['genre'].str.strip() != '')]
+        genre_preferences = (
+            exploded.groupby('genre', sort=False)['rating'].mean()
+            .sort_values(ascending=False, kind='stable')
+        )
         
         profile = {
             'total_ratings': len(user_ratings),
             'avg_rating': user_ratings['rating'].mean(),
             'rating_std': user_ratings['rating'].std(),
-            'favorite_genres': sorted(genre_preferences.items(), key=lambda x: x[1], reverse=True)[:5],
+            'favorite_genres': list(genre_preferences.head(5).items()),
             'rating_distribution': user_ratings['rating'].value_counts().sort_index().to_dict()
         }
         
@@ -158,13 +152,18 @@ class RecommendationUtils:
     @staticmethod
     def similarity_explanation(movie1_genres, movie2_genres):
         """
-        Generate explanation for why two movies are similar
+        Generate explanation for why two movies are similar. Accepts genre
+        strings or pre-split sets (e.g. engine.movie_genre_sets[row]).
         """
-        if pd.isna(movie1_genres) or pd.isna(movie2_genres):
+        if isinstance(movie1_genres, (set, frozenset)) and isinstance(movie2_genres, (set, frozenset)):
+            if not movie1_genres or not movie2_genres:
+                return "Limited genre information available"
+            genres1, genres2 = movie1_genres, movie2_genres
+        elif pd.isna(movie1_genres) or pd.isna(movie2_genres):
             return "Limited genre information available"
-        
-        genres1 = set(movie1_genres.split('|'))
-        genres2 = set(movie2_genres.split('|'))
+        else:
+            genres1 = set(movie1_genres.split('|'))
+            genres2 = set(movie2_genres.split('|'))
         
         common_genres = genres1.intersection(genres2)
         
@@ -178,22 +177,18 @@ class RecommendationUtils:
         """
         Get trending movies based on recent ratings
         """
-        # Convert timestamp to datetime if it's not already
-        if 'timestamp' in ratings_df.columns:
-            ratings_df['datetime'] = pd.to_datetime(ratings_df['timestamp'], unit='s')
-            
-            # Filter recent ratings
-            cutoff_date = ratings_df['datetime'].max() - pd.Timedelta(days=time_window_days)
-            recent_ratings = ratings_df[ratings_df['datetime'] >= cutoff_date]
+        # Filter recent ratings by comparing Unix timestamps (seconds)
+        # directly, without converting the column or modifying ratings_df
+        if 'timestamp' in ratings_df.columns and len(ratings_df) > 0:
+            timestamps = ratings_df['timestamp'].to_numpy(np.int64)
+            cutoff = timestamps.max() - time_window_days * 86400
+            recent_ratings = ratings_df[timestamps >= cutoff]
         else:
             # If no timestamp, use all ratings
             recent_ratings = ratings_df
         
         # Calculate trending score (combination of rating and frequency)
-        trending_scores = recent_ratings.groupby('movieId').agg({
-            'rating': ['mean', 'count']
-        }).reset_index()
-        
+        trending_scores = DataProcessor.movie_rating_stats(recent_ratings)
         trending_scores.columns = ['movieId', 'avg_rating', 'rating_count']
         
         # Calculate trending score (weighted by both rating and count)